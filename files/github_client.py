@@ -9,51 +9,191 @@ Description: 封装GitHub API操作，包含网络重试、缓存和性能优化
 import requests
 import json
 import base64
+import asyncio
+import inspect
 import logging
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+import os
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 import time
-from functools import wraps
-import hashlib
+import random
+from functools import wraps, _make_key, lru_cache
+from collections import Counter, OrderedDict
+import itertools
+from urllib.parse import urlparse, parse_qs, urlencode, quote
+from requests.structures import CaseInsensitiveDict
+import heapq
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，缺失时回退到标准库json
+    orjson = None
+
+try:
+    import diskcache
+except ImportError:  # diskcache为可选依赖，缺失时仅使用内存缓存
+    diskcache = None
+
+# backoff_jitter需要urllib3>=2.0，requests仍兼容urllib3 1.26，按需传入
+_RETRY_SUPPORTS_JITTER = "backoff_jitter" in inspect.signature(Retry.__init__).parameters
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def cache_result(expiry_seconds=300):
-    """缓存装饰器"""
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024  # 流式下载分块大小，与TCP接收缓冲区对齐
+_LFS_ATTRS = "filter=lfs diff=lfs merge=lfs -text"  # .gitattributes中LFS跟踪属性
+
+def _loads(data: bytes):
+    """解析JSON bytes，优先使用orjson（无需先解码为str）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _dumps(data: Dict) -> bytes:
+    """序列化请求体为JSON bytes，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+def _dir_tag(url: str) -> str:
+    """缓存条目所属目录：带查询参数的是列表请求（目录本身），否则是文件（取父目录）"""
+    base, _, query = url.partition('?')
+    return base.rstrip('/') if query else base.rsplit('/', 1)[0]
+
+@lru_cache(maxsize=1024)
+def _quote_path(path: str) -> str:
+    """对仓库内路径做URL编码（保留/），支持空格、#、中文等文件名"""
+    return quote(path, safe='/')
+
+class _LRU(OrderedDict):
+    """带容量上限的LRU字典，超出maxsize时淘汰最久未使用的条目"""
+
+    def __init__(self, maxsize: int = 128):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def put(self, key, value):
+        """写入条目并标记为最近使用，超出容量时淘汰最旧条目"""
+        self[key] = value
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+def cache_result(expiry_seconds=300, maxsize=128):
+    """缓存装饰器（LRU淘汰 + 过期时间）"""
     def decorator(func):
-        cache = {}
+        cache = _LRU(maxsize)
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            # 生成缓存键
-            key = hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()
-            
-            # 检查缓存
-            if key in cache:
-                result, timestamp = cache[key]
-                if datetime.now() - timestamp < timedelta(seconds=expiry_seconds):
-                    logger.debug(f"缓存命中: {func.__name__}")
+            # 检查缓存（命中路径仅一次字典查找和一次时间比较）
+            try:
+                # 生成缓存键：无关键字参数时直接使用位置参数元组，否则与lru_cache相同
+                key = args if not kwargs else _make_key(args, kwargs, typed=False)
+                result, deadline = cache[key]
+                if time.monotonic() < deadline:
+                    cache.move_to_end(key)
+                    logger.debug("缓存命中: %s", func.__name__)
                     return result
+            except KeyError:
+                pass
+            except TypeError:
+                # 参数不可哈希，无法缓存
+                return func(self, *args, **kwargs)
             
             # 执行原始函数
             result = func(self, *args, **kwargs)
             
             # 缓存结果
             if result is not None:
-                cache[key] = (result, datetime.now())
-                logger.debug(f"缓存更新: {func.__name__}")
+                cache.put(key, (result, time.monotonic() + expiry_seconds))
+                logger.debug("缓存更新: %s", func.__name__)
             
             return result
         return wrapper
     return decorator
 
+class _TokenBucket:
+    """令牌桶限流器，在客户端主动控制请求速率以避免触发GitHub限流"""
+    
+    _WARN_WAIT = 5  # 等待超过该秒数时以warning输出，避免看起来像卡死
+    
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate  # 每秒补充的令牌数
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.refill_rate)
+        self.last = now
+    
+    def reserve(self, n: int = 1) -> float:
+        """预占n个令牌，返回需要等待的秒数（不休眠）"""
+        with self._lock:
+            self._refill()
+            self.tokens -= n
+            return -self.tokens / self.refill_rate if self.tokens < 0 else 0
+    
+    def take(self, n: int = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """预占n个令牌并返回需等待的秒数；超过max_wait时归还令牌并返回None"""
+        wait_time = self.reserve(n)
+        if wait_time <= 0:
+            return 0
+        resume_at = time.strftime('%H:%M:%S', time.localtime(time.time() + wait_time))
+        if max_wait is not None and wait_time > max_wait:
+            with self._lock:
+                self.tokens += n
+            logger.error(f"API额度不足，需等待 {wait_time:.0f} 秒（约 {resume_at} 恢复），"
+                         f"超过上限 {max_wait:.0f} 秒，放弃本次请求")
+            return None
+        if wait_time > self._WARN_WAIT:
+            logger.warning(f"触发限流，等待 {wait_time:.0f} 秒（约 {resume_at} 恢复）")
+        else:
+            logger.debug(f"触发本地限流，等待 {wait_time:.2f} 秒")
+        return wait_time
+    
+    def acquire(self, n: int = 1, max_wait: Optional[float] = None) -> bool:
+        """获取n个令牌，不足时等待补充（预占令牌后在锁外休眠）；需等待过久时返回False"""
+        wait_time = self.take(n, max_wait)
+        if wait_time is None:
+            return False
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return True
+    
+    def sync(self, remaining: int, reset_after: float):
+        """根据服务端返回的剩余额度校正令牌数"""
+        with self._lock:
+            self._refill()
+            if remaining <= 0:
+                # 额度耗尽，令牌置为负值使后续请求等待到重置时间
+                self.tokens = min(self.tokens, -reset_after * self.refill_rate)
+            else:
+                self.tokens = min(self.tokens, remaining)
+
 class GitHubClient:
     """GitHub API客户端 - 优化版（包含缓存、批量操作和性能优化）"""
     
-    def __init__(self, token: str, username: str):
+    _BRANCH_TTL = 3600  # 默认分支极少变化，缓存1小时
+    _WRITE_METHODS = frozenset({"PUT", "POST", "PATCH", "DELETE"})
+    _BATCH_WORKERS = 4  # 批量上传时并发准备请求体的线程数，提交本身按仓库串行
+    _CONFLICT_RETRIES = 3  # 分支头冲突(409)时重试创建的次数
+    _RETRY_STATUSES = (429, 500, 502, 503, 504)  # 需要重试的状态码
+    _DISK_CACHE_SIZE = 256 * 1024 * 1024  # 磁盘缓存上限256MB
+    _DISK_TTL = 86400  # 磁盘条目保留1天，过期新鲜度后仍可用ETag做条件请求
+    
+    # Git LFS跟踪的文件类型，.gitattributes内容在导入时预先生成
+    _LFS_PATTERNS = ("*.zip", "*.rar", "*.7z", "*.mp4", "*.mov")
+    _LFS_GITATTRIBUTES = "\n".join(f"{p} {_LFS_ATTRS}" for p in _LFS_PATTERNS).encode('utf-8')
+    
+    def __init__(self, token: str, username: str, cache_dir: Optional[str] = None,
+                 lfs_patterns: Optional[List[str]] = None, max_rate_wait: Optional[float] = 60):
         self.token = token
         self.username = username
         self.base_url = "https://api.github.com"
@@ -65,33 +205,90 @@ class GitHubClient:
         # 缓存相关
         self.cache = {}
         self.cache_expiry = 300  # 5分钟缓存
+        self._exp_heap: List[Tuple[float, int, Hashable]] = []  # (过期时间, 序号, 缓存键) 最小堆
+        self._heap_seq = itertools.count()  # 过期时间相同时按序号排序，避免比较不同类型的键
+        self._repo_keys: Set[str] = set()  # repo_* 缓存键索引
+        self._dir_keys: Dict[str, Set[Hashable]] = {}  # 目录 -> 该目录下文件/列表请求的缓存键
+        self._default_branch: Dict[str, Tuple[str, float]] = {}  # 仓库 -> (默认分支, 过期时间)
+        self._repo_prefix: Dict[str, str] = {}  # 仓库 -> API URL前缀
+        self._sha_cache: Dict[Tuple[str, str], str] = {}  # (仓库, 路径) -> 文件SHA，覆盖写入时免去GET
+        self._etags = _LRU(maxsize=256)  # 缓存键 -> (ETag, 响应)，过期后用于条件请求
+        self._inflight: Dict[Hashable, Future] = {}  # 进行中的GET请求，相同请求合并为一次
+        self._inflight_lock = threading.Lock()
+        # 每次contents写入都会在分支上产生提交，GitHub要求同一仓库的写入串行，否则返回409
+        self._repo_write_locks: Dict[str, threading.Lock] = {}
+        self._repo_write_locks_lock = threading.Lock()
+        
+        # 磁盘缓存（可选，如"~/.ghpan/cache"）：进程重启后仍保留GET响应
+        # 响应以明文保存，包含私有仓库的文件内容，因此默认不启用
+        self._disk = None
+        if diskcache is not None and cache_dir:
+            try:
+                # 按目录打tag并建立tag索引，写入后可按目录失效而无需遍历全部键
+                self._disk = diskcache.Cache(os.path.expanduser(cache_dir),
+                                             size_limit=self._DISK_CACHE_SIZE, tag_index=True)
+            except Exception as e:
+                logger.warning(f"磁盘缓存不可用，仅使用内存缓存: {str(e)}")
+        
+        # 额外的LFS文件类型（如"*.iso"），仅在构造时拼接一次
+        self._lfs_gitattributes = self._LFS_GITATTRIBUTES
+        if lfs_patterns:
+            extra = "\n".join(f"{p} {_LFS_ATTRS}" for p in lfs_patterns)
+            self._lfs_gitattributes += b"\n" + extra.encode('utf-8')
         
         # 创建带重试机制的session
         self.session = requests.Session()
         self._setup_session()
         
-        # 请求统计
-        self.request_count = 0
-        self.cached_requests = 0
+        # 请求统计（批量上传为多线程，计数使用独立的锁，不与缓存写入争用）
+        self._stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+        self._lock = threading.Lock()  # 保护缓存、过期堆与ETag表
+        
+        # 本地限流：读请求5000次/小时，内容写入80次/分钟
+        self._read_bucket = _TokenBucket(capacity=5000, refill_rate=5000 / 3600)
+        self._write_bucket = _TokenBucket(capacity=80, refill_rate=80 / 60)
+        self.max_rate_wait = max_rate_wait  # 限流等待上限（秒），超过则直接失败；None表示一直等待
         
         logger.info(f"GitHub客户端初始化 - 用户: {username}")
     
+    @property
+    def request_count(self) -> int:
+        """累计发起的网络请求数"""
+        return self._stats['total_requests']
+    
+    @property
+    def cached_requests(self) -> int:
+        """累计缓存命中数"""
+        return self._stats['cached_requests']
+    
+    def _count(self, name: str):
+        """原子地增加一项请求统计"""
+        with self._stats_lock:
+            self._stats[name] += 1
+    
     def _setup_session(self):
         """配置带重试机制的HTTP session"""
         # 配置重试策略
+        # 重试完全交给urllib3，_make_request中不再叠加手写重试
+        jitter = {"backoff_jitter": 1.0} if _RETRY_SUPPORTS_JITTER else {}  # 随机抖动，避免多个客户端同步重试
         retry_strategy = Retry(
-            total=3,  # 总重试次数
+            total=5,  # 总重试次数
             backoff_factor=1,  # 重试间隔倍数
-            status_forcelist=[429, 500, 502, 503, 504],  # 需要重试的状态码
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST", "PUT", "DELETE"]
+            **jitter,
+            status_forcelist=self._RETRY_STATUSES,  # 需要重试的状态码
+            allowed_methods=frozenset({"HEAD", "GET", "OPTIONS", "POST", "PUT", "DELETE"}),
+            respect_retry_after_header=True,  # 遵循GitHub限流返回的Retry-After
+            raise_on_status=False  # 重试耗尽后返回最后的响应，由调用方处理状态码
         )
         
         # 配置适配器
         adapter = HTTPAdapter(
             max_retries=retry_strategy,
-            pool_connections=10,
-            pool_maxsize=20
+            pool_connections=20,
+            pool_maxsize=50
         )
+        self.pool_maxsize = 50
         
         # 应用到http和https
         self.session.mount("http://", adapter)
@@ -100,88 +297,319 @@ class GitHubClient:
         # 设置默认headers
         self.session.headers.update(self.headers)
     
+    def _prefix(self, repo: str) -> str:
+        """获取仓库API URL前缀（按仓库缓存）"""
+        prefix = self._repo_prefix.get(repo)
+        if prefix is None:
+            prefix = self._repo_prefix[repo] = f"{self.base_url}/repos/{self.username}/{repo}"
+        return prefix
+    
+    def _contents_url(self, repo: str, path: str) -> str:
+        """构造contents接口URL，路径经过URL编码"""
+        return f"{self._prefix(repo)}/contents/{_quote_path(path)}"
+    
+    def _upload_body(self, message: str, content: bytes, sha: Optional[str] = None) -> bytes:
+        """构造contents接口PUT请求体，带sha时为更新"""
+        data = {
+            "message": message,
+            "content": base64.b64encode(content).decode('ascii')
+        }
+        if sha:
+            data["sha"] = sha
+        return _dumps(data)
+    
+    def _put_file(self, repo: str, path: str, content: bytes, message: str,
+                  sha: Optional[str] = None) -> Optional[requests.Response]:
+        """PUT文件内容；未带sha时的409是分支头冲突而非SHA过期，退避后重试"""
+        url = self._contents_url(repo, path)
+        body = self._upload_body(message, content, sha)
+        for attempt in range(self._CONFLICT_RETRIES):
+            response = self._write_contents("PUT", repo, url, data=body,
+                                            headers={"Content-Type": "application/json"})
+            if response is None or response.status_code != 409 or sha:
+                return response
+            if attempt < self._CONFLICT_RETRIES - 1:
+                wait_time = (2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"分支提交冲突 (409)，{wait_time:.1f}秒后重试: {path}")
+                time.sleep(wait_time)
+        return response
+    
+    def _remember_sha(self, repo: str, path: str, result: Optional[Dict]):
+        """记录上传/更新后返回的文件SHA"""
+        sha = ((result or {}).get('content') or {}).get('sha')
+        if sha:
+            self._sha_cache[(repo, path.strip('/'))] = sha
+    
+    def _repo_write_lock(self, repo: str) -> threading.Lock:
+        """获取仓库的写入锁，保证同一仓库的contents写入逐个提交"""
+        with self._repo_write_locks_lock:
+            lock = self._repo_write_locks.get(repo)
+            if lock is None:
+                lock = self._repo_write_locks[repo] = threading.Lock()
+            return lock
+    
+    def _write_contents(self, method: str, repo: str, url: str, **kwargs) -> Optional[requests.Response]:
+        """在仓库写入锁内发起contents写请求（PUT/DELETE）"""
+        with self._repo_write_lock(repo):
+            response = self._make_request(method, url, use_cache=False, **kwargs)
+        if response is not None and response.status_code < 400:
+            # 写入后清除该文件及所在目录列表的旧响应（内存与磁盘），
+            # 之后的列表请求不会用旧SHA覆盖_sha_cache，新进程也不会读到过期内容
+            url_dir = _dir_tag(url)
+            self._evict_dir(url_dir)
+            self._disk_evict(url_dir)
+        return response
+    
+    def _parse(self, response: requests.Response):
+        """解析响应JSON，直接使用已在内存中的响应bytes"""
+        return _loads(response.content)
+    
+    def _cache_get(self, key: Hashable):
+        """读取未过期的缓存条目，未命中返回None"""
+        entry = self.cache.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+        return None
+    
+    def _cache_set(self, key: Hashable, value):
+        """写入缓存并登记过期堆、仓库键与目录键索引"""
+        deadline = time.monotonic() + self.cache_expiry
+        with self._lock:
+            self.cache[key] = (value, deadline)
+            heapq.heappush(self._exp_heap, (deadline, next(self._heap_seq), key))
+            if isinstance(key, str):
+                if key.startswith('repo_'):
+                    self._repo_keys.add(key)
+            else:
+                self._dir_keys.setdefault(_dir_tag(key[0]), set()).add(key)
+    
+    def _sweep(self):
+        """弹出已过期的缓存条目，仅处理堆顶过期部分 O(k log n)"""
+        now = time.monotonic()
+        with self._lock:
+            while self._exp_heap and self._exp_heap[0][0] <= now:
+                _, _, key = heapq.heappop(self._exp_heap)
+                entry = self.cache.get(key)
+                # 条目可能已被刷新为更晚的过期时间，只删除确实过期的
+                if entry is not None and entry[1] <= now:
+                    del self.cache[key]
+                    if isinstance(key, str):
+                        self._repo_keys.discard(key)
+                    else:
+                        keys = self._dir_keys.get(_dir_tag(key[0]))
+                        if keys is not None:
+                            keys.discard(key)
+                            if not keys:
+                                del self._dir_keys[_dir_tag(key[0])]
+    
+    def _evict_dir(self, url_dir: str):
+        """删除内存中某目录下文件及目录列表的缓存，O(k)遍历目录键索引"""
+        with self._lock:
+            for key in self._dir_keys.pop(url_dir, ()):
+                self.cache.pop(key, None)
+    
+    def _disk_key(self, cache_key: Tuple[str, frozenset]) -> str:
+        """磁盘缓存键：按用户区分，参数排序保证跨进程稳定"""
+        url, params = cache_key
+        if params:
+            url = f"{url}?{urlencode(sorted(params))}"
+        return f"{self.username}:{url}"
+    
+    def _disk_get(self, cache_key: Tuple[str, frozenset]):
+        """读取磁盘缓存，返回(响应, ETag, 新鲜截止时间)或None"""
+        if self._disk is None:
+            return None
+        try:
+            entry = self._disk.get(self._disk_key(cache_key))
+        except Exception as e:
+            logger.debug(f"读取磁盘缓存失败: {str(e)}")
+            return None
+        if entry is None:
+            return None
+        (status_code, headers, content, url, encoding), etag, fresh_until = entry
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response.url = url
+        response.encoding = encoding
+        return response, etag, fresh_until
+    
+    def _disk_set(self, cache_key: Tuple[str, frozenset], response: requests.Response):
+        """将响应以可pickle的元组形式写入磁盘缓存"""
+        if self._disk is None:
+            return
+        # 磁盘缓存跨进程存活，新鲜度使用墙上时间而非monotonic
+        entry = (
+            (response.status_code, dict(response.headers), response.content, response.url, response.encoding),
+            response.headers.get('ETag'),
+            time.time() + self.cache_expiry
+        )
+        try:
+            self._disk.set(self._disk_key(cache_key), entry, expire=self._DISK_TTL,
+                           tag=f"{self.username}:{_dir_tag(cache_key[0])}")
+        except Exception as e:
+            logger.debug(f"写入磁盘缓存失败: {str(e)}")
+    
+    def _disk_evict(self, url_dir: str):
+        """按tag删除当前用户某目录下的磁盘缓存条目（文件及目录列表），走tag索引"""
+        if self._disk is None:
+            return
+        try:
+            self._disk.evict(f"{self.username}:{url_dir}")
+        except Exception as e:
+            logger.debug(f"清理磁盘缓存失败: {str(e)}")
+    
+    def _disk_clear_user(self):
+        """删除当前用户的全部磁盘缓存条目，不影响其他用户（仅clear_cache使用）"""
+        if self._disk is None:
+            return
+        prefix = f"{self.username}:"
+        try:
+            stale = [key for key in self._disk.iterkeys()
+                     if isinstance(key, str) and key.startswith(prefix)]
+            for key in stale:
+                self._disk.delete(key)
+        except Exception as e:
+            logger.debug(f"清理磁盘缓存失败: {str(e)}")
+    
     def _make_request(self, method: str, url: str, use_cache: bool = True, **kwargs) -> Optional[requests.Response]:
         """统一的请求方法，包含重试、缓存和错误处理"""
         # 缓存键生成
         cache_key = None
-        if use_cache and method.upper() == 'GET':
-            cache_key = hashlib.md5((url + str(kwargs)).encode()).hexdigest()
+        validator = None
+        if method.upper() == 'GET':
+            cache_key = (url, frozenset((kwargs.get('params') or {}).items()))
             
             # 检查缓存
-            if cache_key in self.cache:
-                cached_result, timestamp = self.cache[cache_key]
-                if datetime.now() - timestamp < timedelta(seconds=self.cache_expiry):
-                    self.cached_requests += 1
-                    logger.debug(f"缓存命中: {url}")
+            if use_cache:
+                cached_result = self._cache_get(cache_key)
+                if cached_result is not None:
+                    self._count('cached_requests')
+                    logger.debug("缓存命中: %s", url)
                     return cached_result
         
+        # 未命中内存缓存时才顺带清理过期条目，命中路径不加锁
+        self._sweep()
+        
+        if cache_key is not None:
+            if use_cache:
+                # 内存未命中时检查磁盘缓存，过期条目仍可提供ETag
+                disk_entry = self._disk_get(cache_key)
+                if disk_entry is not None:
+                    disk_response, etag, fresh_until = disk_entry
+                    if time.time() < fresh_until:
+                        self._cache_set(cache_key, disk_response)
+                        self._count('cached_requests')
+                        logger.debug("磁盘缓存命中: %s", url)
+                        return disk_response
+                    if etag:
+                        with self._lock:
+                            if cache_key not in self._etags:
+                                self._etags.put(cache_key, (etag, disk_response))
+            
+            # 缓存过期但持有ETag时发起条件请求，未变化则服务端返回304
+            with self._lock:
+                validator = self._etags.get(cache_key)
+            if validator is not None:
+                kwargs['headers'] = {**(kwargs.get('headers') or {}), 'If-None-Match': validator[0]}
+            
+            # 相同的GET正在进行时等待其结果，避免并发重复请求
+            with self._inflight_lock:
+                future = self._inflight.get(cache_key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._inflight[cache_key] = future
+            if not owner:
+                logger.debug("合并进行中的请求: %s", url)
+                return future.result()
+            
+            try:
+                response = self._send_request(method, url, cache_key, validator, use_cache, **kwargs)
+                future.set_result(response)
+                return response
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(cache_key, None)
+        
+        return self._send_request(method, url, cache_key, validator, use_cache, **kwargs)
+    
+    def _send_request(self, method: str, url: str, cache_key: Optional[Hashable],
+                      validator: Optional[Tuple[str, requests.Response]], use_cache: bool,
+                      **kwargs) -> Optional[requests.Response]:
+        """实际发起请求：限流、ETag校验与缓存写入"""
         # 设置默认超时
         if 'timeout' not in kwargs:
             kwargs['timeout'] = (10, 30)  # (连接超时, 读取超时)
         
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                self.request_count += 1
-                logger.debug(f"发起请求 [{method}] {url} (尝试 {attempt + 1}/{max_retries})")
-                response = self.session.request(method, url, **kwargs)
-                
-                # 缓存GET请求的成功响应
-                if cache_key and response.status_code < 400:
-                    self.cache[cache_key] = (response, datetime.now())
-                
-                # 检查状态码
-                if response.status_code < 400:
-                    return response
-                elif response.status_code == 401:
-                    logger.error("认证失败: Token无效或过期")
-                    return response
-                elif response.status_code == 403:
-                    logger.error("权限不足: 请检查Token权限")
-                    return response
-                elif response.status_code in [429, 500, 502, 503, 504]:
-                    # 对于这些状态码进行重试
-                    if attempt < max_retries - 1:
-                        wait_time = (2 ** attempt) + 1  # 指数退避
-                        logger.warning(f"请求失败 (状态码: {response.status_code})，{wait_time}秒后重试...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error(f"重试{max_retries}次后仍然失败: {response.status_code}")
-                        return response
-                else:
-                    # 其他错误状态码直接返回
-                    return response
-                    
-            except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + 1
-                    logger.warning(f"请求超时，{wait_time}秒后重试...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    logger.error("请求超时，已达最大重试次数")
-                    return None
-            except requests.exceptions.ConnectionError as e:
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + 1
-                    logger.warning(f"连接错误: {str(e)}, {wait_time}秒后重试...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    logger.error(f"连接错误，已达最大重试次数: {str(e)}")
-                    return None
-            except Exception as e:
-                logger.error(f"请求异常: {str(e)}")
-                return None
+        bucket = self._write_bucket if method.upper() in self._WRITE_METHODS else self._read_bucket
+        if not bucket.acquire(max_wait=self.max_rate_wait):
+            return None
         
-        return None
+        try:
+            self._count('total_requests')
+            logger.info("发起请求 [%s] %s", method, url)  # 仅在缓存未命中时输出
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.Timeout:
+            logger.error("请求超时，已达最大重试次数")
+            return None
+        except requests.exceptions.ConnectionError as e:
+            logger.error(f"连接错误，已达最大重试次数: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"请求异常: {str(e)}")
+            return None
+        
+        self._sync_rate_limit(response)
+        
+        # 304: 资源未变化，复用之前的响应并刷新缓存时间
+        if validator is not None and response.status_code == 304:
+            logger.debug("条件请求未变化: %s", url)
+            response = validator[1]
+            with self._lock:
+                if cache_key in self._etags:
+                    self._etags.move_to_end(cache_key)
+        elif cache_key and response.status_code == 200 and response.headers.get('ETag'):
+            with self._lock:
+                self._etags.put(cache_key, (response.headers['ETag'], response))
+        
+        # 缓存GET请求的成功响应
+        if use_cache and cache_key and response.status_code < 400:
+            self._cache_set(cache_key, response)
+            if response.status_code == 200:
+                self._disk_set(cache_key, response)
+        
+        # 检查状态码
+        if response.status_code == 401:
+            logger.error("认证失败: Token无效或过期")
+        elif response.status_code == 403:
+            logger.error("权限不足: 请检查Token权限")
+        elif response.status_code in self._RETRY_STATUSES:
+            logger.error(f"重试后仍然失败: {response.status_code}")
+        return response
+    
+    def _sync_rate_limit(self, response: requests.Response):
+        """根据X-RateLimit-*响应头校正本地读请求令牌桶"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        if response.headers.get('X-RateLimit-Resource', 'core') != 'core':
+            return
+        try:
+            self._read_bucket.sync(int(remaining), max(0.0, int(reset) - time.time()))
+        except ValueError:
+            pass
     
     @cache_result(300)  # 5分钟缓存
     def get_user_repos(self) -> Optional[List[Dict]]:
-        """获取用户所有仓库 - 带缓存"""
+        """获取用户所有仓库 - 带缓存，多页时并发拉取剩余页"""
         try:
-            url = f"{self.base_url}/user/repos?per_page=100"
+            url = f"{self.base_url}/user/repos?per_page=100&sort=pushed&type=owner"
             logger.info(f"获取用户仓库列表: {url}")
             
             response = self._make_request("GET", url, use_cache=True)
@@ -190,13 +618,30 @@ class GitHubClient:
                 logger.error("网络请求失败")
                 return None
                 
-            if response.status_code == 200:
-                repos = response.json()
-                logger.info(f"成功获取 {len(repos)} 个仓库")
-                return repos
-            else:
+            if response.status_code != 200:
                 logger.error(f"获取仓库列表失败: {response.status_code} - {response.text}")
                 return None
+            
+            repos = self._parse(response)
+            
+            # 根据Link头中的rel="last"确定总页数，并发获取第2..N页
+            last_url = response.links.get('last', {}).get('url')
+            if last_url:
+                last_page = int(parse_qs(urlparse(last_url).query).get('page', ['1'])[0])
+                page_urls = [f"{url}&page={page}" for page in range(2, last_page + 1)]
+                with ThreadPoolExecutor(max_workers=min(8, len(page_urls) or 1)) as executor:
+                    page_responses = list(executor.map(
+                        lambda page_url: self._make_request("GET", page_url, use_cache=True),
+                        page_urls
+                    ))
+                for page_url, page_response in zip(page_urls, page_responses):
+                    if page_response is None or page_response.status_code != 200:
+                        logger.error(f"获取仓库列表分页失败: {page_url}")
+                        return None
+                    repos.extend(self._parse(page_response))
+            
+            logger.info(f"成功获取 {len(repos)} 个仓库")
+            return repos
                 
         except Exception as e:
             logger.error(f"获取仓库列表时发生未知错误: {str(e)}")
@@ -205,22 +650,34 @@ class GitHubClient:
     def get_repo_by_name(self, name: str) -> Optional[Dict]:
         """根据名称获取特定仓库信息 - 带缓存"""
         cache_key = f"repo_{name}"
-        if cache_key in self.cache:
-            result, timestamp = self.cache[cache_key]
-            if datetime.now() - timestamp < timedelta(seconds=self.cache_expiry):
-                return result
+        result = self._cache_get(cache_key)
+        if result is not None:
+            return result
         
         try:
-            url = f"{self.base_url}/repos/{self.username}/{name}"
+            url = self._prefix(name)
             response = self._make_request("GET", url, use_cache=False)  # 不使用全局缓存
             if response and response.status_code == 200:
-                result = response.json()
-                self.cache[cache_key] = (result, datetime.now())  # 单独缓存
+                result = self._parse(response)
+                self._cache_set(cache_key, result)  # 单独缓存
                 return result
             return None
         except:
             return None
     
+    def _get_default_branch(self, repo: str) -> Optional[str]:
+        """获取仓库默认分支 - 独立的长时间缓存"""
+        entry = self._default_branch.get(repo)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+        
+        repo_info = self.get_repo_by_name(repo)
+        if not repo_info:
+            return None
+        branch = repo_info.get('default_branch', 'main')
+        self._default_branch[repo] = (branch, time.monotonic() + self._BRANCH_TTL)
+        return branch
+    
     def create_repo(self, name: str, private: bool = False) -> Optional[Dict]:
         """创建仓库"""
         try:
@@ -238,10 +695,11 @@ class GitHubClient:
                 return None
                 
             if response.status_code == 201:
-                repo_info = response.json()
+                repo_info = self._parse(response)
                 logger.info(f"仓库创建成功: {repo_info.get('full_name')}")
                 # 清除相关缓存
                 self._clear_repo_cache()
+                self._disk_evict(f"{self.base_url}/user/repos")
                 return repo_info
             elif response.status_code == 422:
                 # 仓库可能已存在
@@ -260,52 +718,65 @@ class GitHubClient:
         return self.get_repo_by_name(name)
     
     def _clear_repo_cache(self):
-        """清除仓库相关的缓存"""
-        keys_to_remove = [k for k in self.cache.keys() if k.startswith('repo_')]
-        for key in keys_to_remove:
-            del self.cache[key]
+        """清除仓库相关的缓存 - 只遍历repo_*键索引，O(k)而非全表扫描"""
+        with self._lock:
+            for key in self._repo_keys:
+                self.cache.pop(key, None)
+            self._repo_keys.clear()
         logger.debug("已清除仓库缓存")
     
     def batch_upload_files(self, repo: str, files: List[Tuple[str, bytes]], 
                           message: str = "Batch upload") -> List[Dict]:
-        """批量上传文件 - 减少API调用"""
-        results = []
-        for path, content in files:
-            result = self.upload_file(repo, path, content, message)
-            results.append({
-                'path': path,
-                'success': result is not None,
-                'result': result
-            })
+        """批量上传文件 - 少量线程并发编码请求体，同一仓库的提交仍逐个进行"""
+        if not files:
+            return []
+        
+        results: List[Optional[Dict]] = [None] * len(files)
+        max_workers = min(len(files), self._BATCH_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.upload_file, repo, path, content, message): (i, path)
+                for i, (path, content) in enumerate(files)
+            }
+            for future in as_completed(futures):
+                i, path = futures[future]
+                result = future.result()
+                results[i] = {
+                    'path': path,
+                    'success': result is not None,
+                    'result': result
+                }
         return results
     
+    async def abatch_upload_files(self, repo: str, files: List[Tuple[str, bytes]],
+                                  message: str = "Batch upload") -> List[Dict]:
+        """异步批量上传文件 - 在线程中执行batch_upload_files，重试、写入锁与缓存失效逻辑只保留一份"""
+        return await asyncio.to_thread(self.batch_upload_files, repo, files, message)
+    
     def upload_file(self, repo: str, path: str, content: bytes, 
                    message: str = "Upload file") -> Optional[Dict]:
         """上传文件到仓库"""
         try:
-            url = f"{self.base_url}/repos/{self.username}/{repo}/contents/{path}"
-            encoded_content = base64.b64encode(content).decode('utf-8')
-            
-            data = {
-                "message": message,
-                "content": encoded_content
-            }
+            # 已知SHA时直接带sha发起更新，省去创建失败后的GET
+            sha = self._sha_cache.get((repo, path.strip('/')))
             
             logger.info(f"上传文件到: {repo}/{path}")
             logger.info(f"文件大小: {len(content)} 字节")
             
-            response = self._make_request("PUT", url, use_cache=False, json=data)
+            response = self._put_file(repo, path, content, message, sha)
             
             if response is None:
                 return None
                 
-            if response.status_code == 201:
-                result = response.json()
+            if response.status_code in (200, 201):
+                result = self._parse(response)
+                self._remember_sha(repo, path, result)
                 logger.info(f"文件上传成功: {path}")
                 return result
-            elif response.status_code == 422:
-                # 文件可能已存在，尝试更新
-                logger.warning(f"文件 {path} 已存在，尝试更新...")
+            elif response.status_code == 422 or (response.status_code == 409 and sha):
+                # 文件已存在（未带sha）或缓存的SHA已过期，重新获取SHA后更新
+                logger.warning(f"文件 {path} 已存在或SHA已过期，尝试更新...")
+                self._sha_cache.pop((repo, path.strip('/')), None)
                 return self._update_existing_file(repo, path, content, message)
             else:
                 logger.error(f"上传文件失败: {response.status_code}")
@@ -321,28 +792,31 @@ class GitHubClient:
         """更新已存在的文件"""
         try:
             # 先获取文件信息获取SHA
-            get_url = f"{self.base_url}/repos/{self.username}/{repo}/contents/{path}"
-            get_response = self._make_request("GET", get_url, use_cache=False)
+            url = self._contents_url(repo, path)
+            get_response = self._make_request("GET", url, use_cache=False)
             
             if get_response and get_response.status_code == 200:
-                file_info = get_response.json()
+                file_info = self._parse(get_response)
                 sha = file_info['sha']
                 
                 # 更新文件
-                put_url = f"{self.base_url}/repos/{self.username}/{repo}/contents/{path}"
-                encoded_content = base64.b64encode(content).decode('utf-8')
-                
-                data = {
-                    "message": message,
-                    "content": encoded_content,
-                    "sha": sha
-                }
-                
-                put_response = self._make_request("PUT", put_url, use_cache=False, json=data)
+                put_response = self._put_file(repo, path, content, message, sha)
                 
                 if put_response and put_response.status_code == 200:
                     logger.info(f"文件更新成功: {path}")
-                    return put_response.json()
+                    result = self._parse(put_response)
+                    self._remember_sha(repo, path, result)
+                    return result
+            elif get_response is not None and get_response.status_code == 404:
+                # 文件并不存在（例如之前的409是分支冲突），按新文件重新创建
+                logger.warning(f"文件 {path} 不存在，重新创建...")
+                put_response = self._put_file(repo, path, content, message)
+                
+                if put_response and put_response.status_code == 201:
+                    logger.info(f"文件上传成功: {path}")
+                    result = self._parse(put_response)
+                    self._remember_sha(repo, path, result)
+                    return result
             
             logger.error("更新文件失败")
             return None
@@ -355,14 +829,13 @@ class GitHubClient:
     def list_files(self, repo: str, path: str = "") -> List[Dict]:
         """列出仓库中的文件 - 带缓存"""
         try:
-            # 获取仓库信息以确定默认分支
-            repo_info = self.get_repo_by_name(repo)
-            if not repo_info:
+            # 获取默认分支
+            default_branch = self._get_default_branch(repo)
+            if not default_branch:
                 logger.error(f"无法获取仓库信息: {repo}")
                 return []
 
-            default_branch = repo_info.get('default_branch', 'main')
-            url = f"{self.base_url}/repos/{self.username}/{repo}/contents/{path}?ref={default_branch}"
+            url = f"{self._contents_url(repo, path)}?ref={_quote_path(default_branch)}"
             logger.info(f"列出文件: {repo}/{path} (分支: {default_branch})")
             
             response = self._make_request("GET", url, use_cache=True)
@@ -371,7 +844,12 @@ class GitHubClient:
                 return []
                 
             if response.status_code == 200:
-                files = response.json()
+                files = self._parse(response)
+                # 记录列表中文件的SHA，常见的"先列出再上传"流程可直接更新
+                if isinstance(files, list):
+                    for item in files:
+                        if item.get('type') == 'file' and item.get('sha'):
+                            self._sha_cache[(repo, item['path'])] = item['sha']
                 logger.info(f"成功获取 {len(files)} 个项目")
                 return files
             else:
@@ -382,95 +860,139 @@ class GitHubClient:
             logger.error(f"列出文件时发生错误: {str(e)}")
             return []
     
+    def _get_download_info(self, repo: str, path: str) -> Optional[Dict]:
+        """获取待下载文件的信息，路径不是文件时返回None"""
+        list_url = self._contents_url(repo, path)
+        response = self._make_request("GET", list_url, use_cache=True)
+        
+        if response is None:
+            logger.error("获取文件信息网络请求失败")
+            return None
+            
+        if response.status_code != 200:
+            logger.error(f"获取文件信息失败: {response.status_code}")
+            return None
+        
+        file_info = self._parse(response)
+        if not isinstance(file_info, dict) or file_info.get('type') != 'file':
+            logger.error("路径不是文件")
+            return None
+        return file_info
+    
     def download_file(self, repo: str, path: str) -> Optional[bytes]:
         """从仓库下载文件 - 增强版"""
         try:
             # 首先获取文件信息
-            list_url = f"{self.base_url}/repos/{self.username}/{repo}/contents/{path}"
-            logger.info(f"获取文件信息: {repo}/{path}")
+            file_info = self._get_download_info(repo, path)
+            if file_info is None:
+                return None
             
-            response = self._make_request("GET", list_url, use_cache=True)
+            # 优先使用download_url
+            download_url = file_info.get('download_url')
+            if download_url:
+                logger.info(f"使用download_url下载: {download_url}")
+                return self._download_from_raw_url(download_url)
             
-            if response is None:
-                logger.error("获取文件信息网络请求失败")
+            # 如果没有download_url，使用content字段（base64编码）
+            content_encoded = file_info.get('content')
+            if content_encoded:
+                content = base64.b64decode(content_encoded)
+                logger.info(f"文件解码成功: {len(content)} 字节")
+                return content
+            else:
+                logger.error("文件内容为空")
                 return None
                 
-            if response.status_code != 200:
-                logger.error(f"获取文件信息失败: {response.status_code}")
-                return None
-            
-            file_info = response.json()
+        except Exception as e:
+            logger.error(f"下载文件时发生错误: {str(e)}")
+            return None
+    
+    def download_file_to(self, repo: str, path: str, local_path: str) -> bool:
+        """下载文件并直接写入本地磁盘 - 大文件峰值内存仅为一个分块"""
+        part_path = f"{local_path}.part"
+        try:
+            file_info = self._get_download_info(repo, path)
+            if file_info is None:
+                return False
             
-            # 如果是文件，直接下载内容
-            if file_info.get('type') == 'file':
-                # 优先使用download_url
+            with open(part_path, 'wb') as f:
                 download_url = file_info.get('download_url')
                 if download_url:
-                    logger.info(f"使用download_url下载: {download_url}")
-                    return self._download_from_raw_url(download_url)
+                    logger.info(f"使用download_url下载到: {local_path}")
+                    def reset():
+                        f.seek(0)
+                        f.truncate()
+                    size = self._stream_raw_url(download_url, f.write, reset)
+                    if size is None:
+                        return False
                 else:
-                    # 如果没有download_url，使用content字段（base64编码）
                     content_encoded = file_info.get('content')
-                    if content_encoded:
-                        content = base64.b64decode(content_encoded)
-                        logger.info(f"文件解码成功: {len(content)} 字节")
-                        return content
-                    else:
+                    if not content_encoded:
                         logger.error("文件内容为空")
-                        return None
-            else:
-                logger.error("路径不是文件")
-                return None
-                
+                        return False
+                    size = f.write(base64.b64decode(content_encoded))
+            
+            # 下载完整后再替换目标文件，避免留下半截文件
+            os.replace(part_path, local_path)
+            logger.info(f"文件已保存: {local_path} ({size} 字节)")
+            return True
+            
         except Exception as e:
             logger.error(f"下载文件时发生错误: {str(e)}")
-            return None
+            return False
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
     
     def _download_from_raw_url(self, url: str) -> Optional[bytes]:
-        """从raw URL下载文件，带重试机制"""
+        """从raw URL流式下载文件到内存，返回bytes（大文件请使用download_file_to）"""
+        chunks: List[bytes] = []
+        size = self._stream_raw_url(url, chunks.append, chunks.clear)
+        if size is None:
+            return None
+        return b"".join(chunks)
+    
+    def _stream_raw_url(self, url: str, write: Callable[[bytes], object],
+                        reset: Callable[[], object]) -> Optional[int]:
+        """从raw URL分块流式读取并交给write处理，返回总字节数
+        
+        建立连接和状态码重试已由session的Retry处理，这里只重试读取响应体时的中断
+        （分块编码错误、读取超时/连接断开），每次重试前调用reset清空已写入的部分。
+        """
         max_retries = 3
         for attempt in range(max_retries):
+            logger.info(f"开始下载文件 (尝试 {attempt + 1}/{max_retries})")
+            reset()
+            
             try:
-                logger.info(f"开始下载文件 (尝试 {attempt + 1}/{max_retries})")
-                
-                # 使用session进行下载，带重试
-                response = self.session.get(url, timeout=(10, 60))
+                response = self.session.get(url, timeout=(10, 60), stream=True)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"下载请求失败: {str(e)}")
+                return None
+            
+            # session默认带Accept-Encoding: gzip, deflate，iter_content会自动解压
+            with response:
+                if response.status_code != 200:
+                    logger.error(f"下载失败: {response.status_code}")
+                    return None
                 
-                if response.status_code == 200:
-                    content = response.content
-                    logger.info(f"文件下载成功: {len(content)} 字节")
-                    return content
-                elif response.status_code in [429, 500, 502, 503, 504]:
+                try:
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                        write(chunk)
+                        size += len(chunk)
+                except (requests.exceptions.ChunkedEncodingError,
+                        requests.exceptions.ConnectionError) as e:
                     if attempt < max_retries - 1:
-                        wait_time = (2 ** attempt) + 2
-                        logger.warning(f"下载失败 (状态码: {response.status_code})，{wait_time}秒后重试...")
+                        wait_time = (2 ** attempt) + 1
+                        logger.warning(f"下载中断: {str(e)}，{wait_time}秒后重试...")
                         time.sleep(wait_time)
                         continue
-                    else:
-                        logger.error(f"下载重试{max_retries}次后仍然失败: {response.status_code}")
-                        return None
-                else:
-                    logger.error(f"下载失败: {response.status_code}")
-                    return None
-                    
-            except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + 2
-                    logger.warning(f"下载超时，{wait_time}秒后重试...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    logger.error("下载超时，已达最大重试次数")
-                    return None
-            except Exception as e:
-                logger.error(f"下载异常: {str(e)}")
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + 1
-                    logger.warning(f"下载异常，{wait_time}秒后重试...")
-                    time.sleep(wait_time)
-                    continue
-                else:
+                    logger.error("下载中断，已达最大重试次数")
                     return None
+            
+            logger.info(f"文件下载成功: {size} 字节")
+            return size
         
         return None
     
@@ -478,19 +1000,20 @@ class GitHubClient:
                    message: str = "Delete file") -> bool:
         """删除仓库中的文件"""
         try:
-            url = f"{self.base_url}/repos/{self.username}/{repo}/contents/{path}"
+            url = self._contents_url(repo, path)
             data = {
                 "message": message,
                 "sha": sha
             }
             logger.info(f"删除文件: {repo}/{path}")
             
-            response = self._make_request("DELETE", url, use_cache=False, json=data)
+            response = self._write_contents("DELETE", repo, url, json=data)
             
             if response is None:
                 return False
                 
             if response.status_code == 200:
+                self._sha_cache.pop((repo, path.strip('/')), None)
                 logger.info(f"文件删除成功: {path}")
                 return True
             else:
@@ -504,9 +1027,7 @@ class GitHubClient:
     def get_file_info(self, repo: str, path: str) -> Optional[Dict]:
         """获取单个文件信息"""
         try:
-            url = f"{self.base_url}/repos/{self.username}/{repo}/contents/{path}"
-            logger.info(f"获取文件信息: {repo}/{path}")
-            
+            url = self._contents_url(repo, path)
             response = self._make_request("GET", url, use_cache=True)
             
             if response is None:
@@ -514,7 +1035,7 @@ class GitHubClient:
                 return None
                 
             if response.status_code == 200:
-                file_info = response.json()
+                file_info = self._parse(response)
                 if file_info.get('type') == 'file':
                     logger.info(f"成功获取文件信息: {file_info.get('name')}")
                     return file_info
@@ -535,17 +1056,8 @@ class GitHubClient:
     def enable_lfs(self, repo: str) -> bool:
         """启用Git LFS"""
         try:
-            lfs_patterns = [
-                "*.zip filter=lfs diff=lfs merge=lfs -text",
-                "*.rar filter=lfs diff=lfs merge=lfs -text",
-                "*.7z filter=lfs diff=lfs merge=lfs -text",
-                "*.mp4 filter=lfs diff=lfs merge=lfs -text",
-                "*.mov filter=lfs diff=lfs merge=lfs -text"
-            ]
-            
-            content = "\n".join(lfs_patterns).encode('utf-8')
-            result = self.upload_file(repo, ".gitattributes", content, 
-                                    "Enable Git LFS for large files")
+            result = self.upload_file(repo, ".gitattributes", self._lfs_gitattributes,
+                                      "Enable Git LFS for large files")
             
             if result:
                 logger.info("Git LFS启用成功")
@@ -560,18 +1072,31 @@ class GitHubClient:
     
     def get_api_usage_stats(self) -> Dict:
         """获取API使用统计"""
+        with self._stats_lock:
+            total = self._stats['total_requests']
+            cached = self._stats['cached_requests']
         return {
-            'total_requests': self.request_count,
-            'cached_requests': self.cached_requests,
-            'cache_hit_rate': self.cached_requests / self.request_count if self.request_count > 0 else 0
+            'total_requests': total,
+            'cached_requests': cached,
+            'cache_hit_rate': cached / total if total > 0 else 0
         }
     
     def clear_cache(self):
         """清空所有缓存"""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
+            self._exp_heap.clear()
+            self._repo_keys.clear()
+            self._dir_keys.clear()
+            self._etags.clear()
+        self._default_branch.clear()
+        self._sha_cache.clear()
+        self._disk_clear_user()
         logger.info("缓存已清空")
     
     def close(self):
         """关闭session"""
         self.session.close()
+        if self._disk is not None:
+            self._disk.close()
         logger.info("GitHub客户端已关闭")
\ No newline at end of file